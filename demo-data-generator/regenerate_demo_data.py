@@ -14,10 +14,22 @@ Usage:
 """
 
 import argparse
+import io
 import math
 import random
+import struct
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+try:
+    import numpy as np
+except ImportError:
+    print("Please install numpy: pip install numpy")
+    exit(1)
+
 try:
     import psycopg2
     from psycopg2.extras import execute_values
@@ -25,6 +37,16 @@ except ImportError:
     print("Please install psycopg2-binary: pip install psycopg2-binary")
     exit(1)
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # Optional: the smoothers fall back to scipy or a plain Python loop
+
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
+
 
 # ============================================
 # SENSOR DEFINITIONS
@@ -61,153 +83,290 @@ POWER_SENSORS = {
     "sensor.demo_boneio_ev_power": {"unit": "W", "has_mean": True, "has_sum": False, "name": "Demo EV Power"},
 }
 
+# Row layouts for the generated statistics; columns not listed are loaded as NULL
+ENERGY_DTYPE = np.dtype([
+    ("created_ts", "f8"), ("metadata_id", "i4"), ("start_ts", "f8"), ("state", "f8"), ("sum", "f8"),
+])
+POWER_DTYPE = np.dtype([
+    ("created_ts", "f8"), ("metadata_id", "i4"), ("start_ts", "f8"), ("mean", "f8"), ("min", "f8"), ("max", "f8"),
+])
+
+# Statistics periods: hourly long-term, 5-minute short-term
+ENERGY_INTERVAL = timedelta(hours=1)
+POWER_INTERVAL = timedelta(minutes=5)
+
+# Target rows per COPY statement: few round trips, bounded memory per chunk
+COPY_CHUNK_ROWS = 50_000
+
+# Binary COPY framing: signature, flags, header extension length / end-of-data marker
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_PGCOPY_TRAILER = struct.pack(">h", -1)
+
+SMOOTHERS = {
+    "solar": {"initial": 0, "smoothing": 0.92},
+    "battery": {"initial": 0, "smoothing": 0.88},
+    "heat_pump": {"initial": 500, "smoothing": 0.90},
+    "induction": {"initial": 0, "smoothing": 0.70},
+    "water_heater": {"initial": 0, "smoothing": 0.80},
+    "ac": {"initial": 0, "smoothing": 0.90},
+    "lighting": {"initial": 50, "smoothing": 0.85},
+    "washing": {"initial": 0, "smoothing": 0.75},
+    "ev": {"initial": 0, "smoothing": 0.95},
+}
+
+# ============================================
+# LOOKUP TABLES (indexed by local hour, minute)
+# ============================================
+
+_HOURS = np.arange(24)
+
+_HEAT_PUMP_BASE = np.where((_HOURS >= 6) & (_HOURS <= 21), 1200, 600)
+_WATER_HEATER_BASE = np.where(np.isin(_HOURS, [6, 7, 8, 19, 20, 21]), 1200, 80)
+_LIGHTING_BASE = np.select([(_HOURS >= 18) & (_HOURS <= 23), (_HOURS >= 6) & (_HOURS <= 8)], [200, 120], default=30)
+_EV_BASE = np.where(np.isin(_HOURS, [23, 0, 1, 2, 3, 4]), 3500, 0)
+_HOUSE_WATER_BASE = np.select([(_HOURS >= 7) & (_HOURS <= 9), (_HOURS >= 18) & (_HOURS <= 21)], [18, 13], default=2.5)
+
+# Solar curve per 5-minute bin of the day (bell around 12:30, daylight 6:00-20:00)
+_BIN_HOURS = np.arange(24 * 12) * 5 / 60
+_SOLAR_BASE = np.where(
+    (_BIN_HOURS >= 6) & (_BIN_HOURS <= 20), np.exp(-((_BIN_HOURS - 12.5) ** 2) / 18), 0
+)
+
+# Heating demand per month (Jan-Dec); cooling only in summer afternoons, peaking at 16:00
+_HEATING_BY_MONTH = np.array([1.0, 1.0, 0.6, 0.3, 0.1, 0.1, 0.1, 0.1, 0.1, 0.3, 0.6, 1.0])
+_COOLING_BY_MONTH = np.array([0, 0, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0])
+_COOLING_BY_HOUR = np.where((_HOURS >= 12) & (_HOURS <= 22), np.maximum(0, 1 - np.abs(_HOURS - 16) / 8), 0)
+
+# Seasonal factor per day of year (index 1-366; index 0 is unused)
+_SEASONAL_BY_DOY = 0.3 + 0.7 * (0.5 + 0.5 * np.sin(2 * np.pi * (np.arange(367) - 80) / 365))
+
+# Induction hob: breakfast, lunch and dinner slots
+_INDUCTION_BASE = np.zeros((24, 60))
+_INDUCTION_BASE[7, 20:51] = 1200
+_INDUCTION_BASE[12, :41] = 1500
+_INDUCTION_BASE[18, 30:] = 2000
+_INDUCTION_BASE[19, :31] = 2000
+
 
 # ============================================
 # HELPER FUNCTIONS
 # ============================================
 
-def get_seasonal_factor(dt: datetime) -> float:
-    day_of_year = dt.timetuple().tm_yday
-    return 0.3 + 0.7 * (0.5 + 0.5 * math.sin(2 * math.pi * (day_of_year - 80) / 365))
+def _utc_offsets(ts: np.ndarray) -> np.ndarray:
+    """Return the local UTC offset (seconds) at each timestamp.
 
+    The offset is sampled once per day, and only days where it changes (DST
+    switches, or a zone moving to a new standard offset) are resolved step by
+    step. time.daylight is not a shortcut: it describes the current rules,
+    not the zone's history.
+    """
+    if not ts.size:
+        return np.zeros(0)
+    days = np.arange(ts[0], ts[-1] + 86400, 86400)
+    day_offsets = np.array([time.localtime(d).tm_gmtoff for d in days])
+    offsets = day_offsets[((ts - ts[0]) // 86400).astype(np.int64)]
+    for i in np.flatnonzero(np.diff(day_offsets)):
+        switch = (ts >= days[i]) & (ts < days[i + 1])
+        offsets[switch] = [time.localtime(t).tm_gmtoff for t in ts[switch]]
+    return offsets
 
-def get_heating_factor(dt: datetime) -> float:
-    m = dt.month
-    if m in [12, 1, 2]: return 1.0
-    if m in [3, 11]: return 0.6
-    if m in [4, 10]: return 0.3
-    return 0.1
 
+def _step_count(start: datetime, end: datetime, step: timedelta) -> int:
+    """Number of steps in [start, end), i.e. rows generated per sensor."""
+    return max(0, math.ceil((end.timestamp() - start.timestamp()) / step.total_seconds()))
 
-def get_cooling_factor(dt: datetime) -> float:
-    m = dt.month
-    h = dt.hour
-    if m in [6, 7, 8] and 12 <= h <= 22:
-        return max(0, 1 - abs(h - 16) / 8)
-    return 0
 
+def _build_time_columns(start: datetime, end: datetime, step: timedelta) -> dict:
+    """Build timestamp and local calendar columns for every step in [start, end).
+
+    Steps are evenly spaced in epoch seconds, so timestamps are strictly
+    increasing and unique even across DST switches (only the local calendar
+    fields repeat or skip an hour). The stats writers rely on this instead
+    of deduplicating rows.
+    """
+    step_secs = step.total_seconds()
+    ts = start.timestamp() + np.arange(_step_count(start, end, step)) * step_secs
+
+    local = (ts + _utc_offsets(ts)).astype(np.int64)
+    days = local // 86400
+    date = days.astype("datetime64[D]")
+    minute_of_day = local % 86400 // 60
+    return {
+        "ts": ts,
+        "hour_i": minute_of_day // 60,
+        "minute": minute_of_day % 60,
+        "month": date.astype("datetime64[M]").astype(np.int64) % 12 + 1,
+        "weekday": (days + 3) % 7,  # 1970-01-01 was a Thursday
+        "doy": (date - date.astype("datetime64[Y]")).astype(np.int64) + 1,
+    }
+
+
+def _in_set(values: np.ndarray, members: tuple) -> np.ndarray:
+    """Vectorized `values in members` for small non-negative ints (bitmask test)."""
+    mask = sum(1 << m for m in members)
+    return (mask >> values) & 1 == 1
+
+
+def get_seasonal_factor(doy: np.ndarray) -> np.ndarray:
+    return _SEASONAL_BY_DOY[doy]
 
-class SmoothValue:
-    def __init__(self, initial=0, smoothing=0.9):
-        self.value = initial
-        self.smoothing = smoothing
-    
-    def update(self, target):
-        self.value = self.value * self.smoothing + target * (1 - self.smoothing)
-        return self.value
+
+def get_heating_factor(month: np.ndarray) -> np.ndarray:
+    return _HEATING_BY_MONTH[month - 1]
+
+
+def get_cooling_factor(month: np.ndarray, hour: np.ndarray) -> np.ndarray:
+    return _COOLING_BY_MONTH[month - 1] * _COOLING_BY_HOUR[hour]
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _ema(targets, smoothing, initial):
+        """Exponentially smooth a target series, starting from `initial`."""
+        out = np.empty(targets.size)
+        value = initial
+        k = 1.0 - smoothing
+        for i in range(targets.size):
+            value = value * smoothing + targets[i] * k
+            out[i] = value
+        return out
+
+    # Compile (or load from the on-disk cache) now rather than mid-run
+    _ema(np.zeros(1), 0.5, 0.0)
+elif lfilter is not None:
+    def _ema(targets, smoothing, initial):
+        """Exponentially smooth a target series, starting from `initial`."""
+        # Same recurrence as a first-order IIR filter, seeded with the previous value
+        return lfilter([1.0 - smoothing], [1.0, -smoothing], targets, zi=[smoothing * initial])[0]
+else:
+    def _ema(targets, smoothing, initial):
+        """Exponentially smooth a target series, starting from `initial`."""
+        # Plain floats and a list: per-item ndarray stores cost more than the math
+        out = []
+        append = out.append
+        value = initial
+        k = 1.0 - smoothing
+        for target in targets.tolist():
+            value = value * smoothing + target * k
+            append(value)
+        return np.array(out, dtype=np.float64)
+
+
+def initial_smoother_state() -> dict:
+    """Starting value of every smoother in SMOOTHERS."""
+    return {name: float(cfg["initial"]) for name, cfg in SMOOTHERS.items()}
+
+
+def smooth(name: str, targets: np.ndarray, state: dict) -> np.ndarray:
+    """Smooth a target series with the named smoother, continuing from `state`."""
+    out = _ema(np.asarray(targets, dtype=np.float64), SMOOTHERS[name]["smoothing"], state[name])
+    if out.size:
+        state[name] = out[-1]
+    return out
 
 
 # ============================================
 # POWER CALCULATION (synchronized)
 # ============================================
 
-def calculate_power(dt: datetime, smoothers: dict) -> dict:
-    """Calculate all power values for a given time (synchronized).
-    
+def calculate_power(cols: dict, smoothers: dict) -> dict:
+    """Calculate all power series for the given time columns (synchronized).
+
+    `smoothers` holds the smoother state and is updated in place, so
+    consecutive chunks of one time axis continue seamlessly.
+
     Energy balance: Grid + Solar + Battery_out = Sum of all devices
     """
-    hour = dt.hour + dt.minute / 60
-    seasonal = get_seasonal_factor(dt)
-    heating = get_heating_factor(dt)
-    cooling = get_cooling_factor(dt)
-    
+    h = cols["hour_i"]
+    m = cols["minute"]
+    seasonal = get_seasonal_factor(cols["doy"])
+    heating = get_heating_factor(cols["month"])
+    cooling = get_cooling_factor(cols["month"], h)
+
     # ============================================
     # FIRST: Calculate all device consumption
     # ============================================
-    
+
     # Heat pump (biggest base load)
-    hp_target = (1200 if 6 <= dt.hour <= 21 else 600) * heating
-    heat_pump = smoothers['heat_pump'].update(hp_target)
-    
+    hp_target = _HEAT_PUMP_BASE[h] * heating
+    heat_pump = smooth('heat_pump', hp_target, smoothers)
+
     # Induction (meal times only)
-    if dt.hour == 7 and 20 <= dt.minute <= 50:
-        ind_target = 1200
-    elif dt.hour == 12 and dt.minute <= 40:
-        ind_target = 1500
-    elif dt.hour in [18, 19] and ((dt.hour == 18 and dt.minute >= 30) or (dt.hour == 19 and dt.minute <= 30)):
-        ind_target = 2000
-    else:
-        ind_target = 0
-    induction = smoothers['induction'].update(ind_target)
-    
+    ind_target = _INDUCTION_BASE[h, m]
+    induction = smooth('induction', ind_target, smoothers)
+
     # Water heater (morning/evening)
-    wh_target = 1200 if dt.hour in [6, 7, 8, 19, 20, 21] else 80
-    water_heater = smoothers['water_heater'].update(wh_target)
-    
+    wh_target = _WATER_HEATER_BASE[h]
+    water_heater = smooth('water_heater', wh_target, smoothers)
+
     # AC (summer afternoons only)
     ac_target = 1500 * cooling
-    ac = smoothers['ac'].update(ac_target)
-    
+    ac = smooth('ac', ac_target, smoothers)
+
     # Lighting
-    if 18 <= dt.hour <= 23:
-        light_target = 200
-    elif 6 <= dt.hour <= 8:
-        light_target = 120
-    else:
-        light_target = 30
-    lighting = smoothers['lighting'].update(light_target)
-    
+    light_target = _LIGHTING_BASE[h]
+    lighting = smooth('lighting', light_target, smoothers)
+
     # Washing (weekend and evening cycles)
-    wd = dt.weekday()
-    if (wd >= 5 and dt.hour in [10, 11, 14, 15]) or (wd < 5 and dt.hour == 19 and dt.minute <= 30):
-        wash_target = 800
-    else:
-        wash_target = 0
-    washing = smoothers['washing'].update(wash_target)
-    
+    wd = cols["weekday"]
+    washing_on = ((wd >= 5) & _in_set(h, (10, 11, 14, 15))) | ((wd < 5) & (h == 19) & (m <= 30))
+    wash_target = np.where(washing_on, 800, 0)
+    washing = smooth('washing', wash_target, smoothers)
+
     # EV Charger (night only, reduced to be more realistic)
-    ev_target = 3500 if dt.hour in [23, 0, 1, 2, 3, 4] else 0
-    ev = smoothers['ev'].update(ev_target)
-    
+    ev_target = _EV_BASE[h]
+    ev = smooth('ev', ev_target, smoothers)
+
     # Other/base load (fridge, standby, etc.) - implicit in grid calculation
     base_load = 150
-    
+
     # ============================================
     # TOTAL CONSUMPTION = sum of all devices
     # ============================================
-    total_consumption = (heat_pump + induction + water_heater + ac + 
+    total_consumption = (heat_pump + induction + water_heater + ac +
                          lighting + washing + ev + base_load)
-    
+
     # ============================================
     # SOLAR PRODUCTION
     # ============================================
-    if hour < 6 or hour > 20:
-        solar_target = 0
-    else:
-        solar_factor = max(0, math.exp(-((hour - 12.5) ** 2) / 18))
-        solar_target = 6000 * seasonal * solar_factor
-    solar = smoothers['solar'].update(solar_target)
-    
+    solar_target = 6000 * seasonal * _SOLAR_BASE[h * 12 + m // 5]
+    solar = smooth('solar', solar_target, smoothers)
+
     # ============================================
     # BATTERY: charges from excess solar, discharges when needed
     # ============================================
-    solar_excess = max(0, solar - total_consumption)
-    solar_deficit = max(0, total_consumption - solar)
-    
-    if solar_excess > 500:
-        # Charge battery from excess solar
-        battery_target = -min(2500, solar_excess * 0.8)
-    elif solar_deficit > 500 and (17 <= dt.hour <= 22):
-        # Discharge battery in evening when solar is low
-        battery_target = min(1500, solar_deficit * 0.6)
-    elif solar_deficit > 0 and (dt.hour >= 22 or dt.hour < 6):
-        # Small discharge at night
-        battery_target = min(300, solar_deficit * 0.3)
-    else:
-        battery_target = 0
-    battery = smoothers['battery'].update(battery_target)
-    
+    solar_excess = np.maximum(0, solar - total_consumption)
+    solar_deficit = np.maximum(0, total_consumption - solar)
+
+    battery_target = np.select(
+        [
+            # Charge battery from excess solar
+            solar_excess > 500,
+            # Discharge battery in evening when solar is low
+            (solar_deficit > 500) & (h >= 17) & (h <= 22),
+            # Small discharge at night
+            (solar_deficit > 0) & ((h >= 22) | (h < 6)),
+        ],
+        [
+            -np.minimum(2500, solar_excess * 0.8),
+            np.minimum(1500, solar_deficit * 0.6),
+            np.minimum(300, solar_deficit * 0.3),
+        ],
+        default=0,
+    )
+    battery = smooth('battery', battery_target, smoothers)
+
     # ============================================
     # GRID = Total consumption - Solar used - Battery discharge
     # ============================================
-    solar_used = min(solar, total_consumption)  # Can't use more solar than we produce
-    battery_discharge = max(0, battery)  # Only positive = discharge
-    
+    solar_used = np.minimum(solar, total_consumption)  # Can't use more solar than we produce
+    battery_discharge = np.maximum(0, battery)  # Only positive = discharge
+
     grid = total_consumption - solar_used - battery_discharge
-    
+
     return {
         "sensor.demo_boneio_solar_power": solar,
-        "sensor.demo_boneio_battery_power": max(0, battery),  # Only show discharge (positive) for power graph
+        "sensor.demo_boneio_battery_power": battery_discharge,  # Only show discharge (positive) for power graph
         "_battery_raw": battery, # Add this for energy calculation
         "sensor.demo_boneio_grid_power": grid,
         "sensor.demo_boneio_heat_pump_power": heat_pump,
@@ -220,14 +379,14 @@ def calculate_power(dt: datetime, smoothers: dict) -> dict:
     }
 
 
-def calculate_energy(dt: datetime, power: dict) -> dict:
-    """Calculate hourly energy from power values."""
+def calculate_energy(power: dict) -> dict:
+    """Calculate hourly energy series from power series."""
     return {
         "sensor.demo_boneio_solar_production": power["sensor.demo_boneio_solar_power"] / 1000,
-        "sensor.demo_boneio_battery_energy_in": max(0, -power.get("_battery_raw", 0)) / 1000,
-        "sensor.demo_boneio_battery_energy_out": max(0, power["sensor.demo_boneio_battery_power"]) / 1000,
-        "sensor.demo_boneio_grid_consumption": max(0, power["sensor.demo_boneio_grid_power"]) / 1000,
-        "sensor.demo_boneio_grid_return": max(0, -power["sensor.demo_boneio_grid_power"]) / 1000,
+        "sensor.demo_boneio_battery_energy_in": np.maximum(0, -power["_battery_raw"]) / 1000,
+        "sensor.demo_boneio_battery_energy_out": np.maximum(0, power["sensor.demo_boneio_battery_power"]) / 1000,
+        "sensor.demo_boneio_grid_consumption": np.maximum(0, power["sensor.demo_boneio_grid_power"]) / 1000,
+        "sensor.demo_boneio_grid_return": np.maximum(0, -power["sensor.demo_boneio_grid_power"]) / 1000,
         "sensor.demo_boneio_heat_pump_energy": power["sensor.demo_boneio_heat_pump_power"] / 1000,
         "sensor.demo_boneio_induction_energy": power["sensor.demo_boneio_induction_power"] / 1000,
         "sensor.demo_boneio_water_heater_energy": power["sensor.demo_boneio_water_heater_power"] / 1000,
@@ -238,22 +397,16 @@ def calculate_energy(dt: datetime, power: dict) -> dict:
     }
 
 
-def calculate_water(dt: datetime) -> dict:
-    """Calculate hourly water consumption (L)."""
-    h = dt.hour
-    m = dt.month
-    
-    if 7 <= h <= 9:
-        house = 18
-    elif 18 <= h <= 21:
-        house = 13
-    else:
-        house = 2.5
-    
-    summer = m in [5, 6, 7, 8, 9]
-    watering = h in [6, 7, 19, 20]
-    garden = 25 if summer and watering else 0
-    
+def calculate_water(cols: dict) -> dict:
+    """Calculate hourly water consumption series (L)."""
+    h = cols["hour_i"]
+
+    house = _HOUSE_WATER_BASE[h]
+
+    summer = _in_set(cols["month"], (5, 6, 7, 8, 9))
+    watering = _in_set(h, (6, 7, 19, 20))
+    garden = np.where(summer & watering, 25.0, 0.0)
+
     return {
         "sensor.demo_boneio_water_total": house + garden,
         "sensor.demo_boneio_water_house": house,
@@ -265,181 +418,246 @@ def calculate_water(dt: datetime) -> dict:
 # DATABASE FUNCTIONS
 # ============================================
 
+def connect(db_url: str):
+    """Open a database connection for regeneration.
+
+    Commits don't wait for the WAL flush (synchronous_commit=off): losing the
+    last moments of a demo regeneration on a server crash is harmless.
+    temp_buffers keeps the power staging table out of the disk cache, and
+    work_mem covers the hashes and sorts of the delete and merge statements.
+    """
+    return psycopg2.connect(
+        db_url,
+        options="-c synchronous_commit=off -c temp_buffers=64MB -c work_mem=64MB",
+    )
+
+
 def ensure_metadata(conn, sensors: dict) -> dict:
-    """Create or update statistics_meta entries."""
+    """Create or update statistics_meta entries in one upsert; returns {statistic_id: id}."""
     cursor = conn.cursor()
-    id_map = {}
-    
-    for sensor_id, meta in sensors.items():
-        cursor.execute("SELECT id FROM statistics_meta WHERE statistic_id = %s", (sensor_id,))
-        result = cursor.fetchone()
-        
-        if result:
-            cursor.execute(
-                "UPDATE statistics_meta SET has_mean = %s, has_sum = %s WHERE id = %s",
-                (meta["has_mean"], meta["has_sum"], result[0])
-            )
-            id_map[sensor_id] = result[0]
-        else:
-            cursor.execute(
-                """INSERT INTO statistics_meta 
-                (statistic_id, source, unit_of_measurement, has_mean, has_sum, name, mean_type)
-                VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id""",
-                (sensor_id, "recorder", meta["unit"], meta["has_mean"], meta["has_sum"], meta.get("name"), 0)
-            )
-            id_map[sensor_id] = cursor.fetchone()[0]
+    rows = [
+        (sensor_id, "recorder", meta["unit"], meta["has_mean"], meta["has_sum"], meta.get("name"), 0)
+        for sensor_id, meta in sensors.items()
+    ]
+    result = execute_values(
+        cursor,
+        """INSERT INTO statistics_meta
+        (statistic_id, source, unit_of_measurement, has_mean, has_sum, name, mean_type)
+        VALUES %s
+        ON CONFLICT (statistic_id) DO UPDATE SET
+            has_mean = EXCLUDED.has_mean,
+            has_sum = EXCLUDED.has_sum
+        RETURNING id, statistic_id""",
+        rows,
+        template="(%s, %s, %s, %s, %s, %s, %s)",
+        page_size=max(1, len(rows)),  # one statement, whatever the sensor count
+        fetch=True,
+    )
     
     conn.commit()
-    return id_map
+    return {statistic_id: meta_id for meta_id, statistic_id in result}
 
 
-def generate_energy_statistics(start: datetime, end: datetime, meta_ids: dict) -> list:
-    """Generate hourly energy statistics."""
-    stats = []
-    current = start
-    sums = {k: 0 for k in meta_ids.keys()}
-    
-    smoothers = {
-        'solar': SmoothValue(0, 0.92), 'battery': SmoothValue(0, 0.88),
-        'grid': SmoothValue(1000, 0.85), 'heat_pump': SmoothValue(500, 0.90),
-        'induction': SmoothValue(0, 0.70), 'water_heater': SmoothValue(0, 0.80),
-        'ac': SmoothValue(0, 0.90), 'lighting': SmoothValue(50, 0.85),
-        'washing': SmoothValue(0, 0.75), 'ev': SmoothValue(0, 0.95),
-    }
-    
-    total = int((end - start).total_seconds() / 3600)
-    i = 0
-    
-    while current < end:
-        power = calculate_power(current, smoothers)
-        energy = calculate_energy(current, power)
-        water = calculate_water(current)
-        
-        ts = current.timestamp()
-        
-        for sensor_id in meta_ids.keys():
-            if sensor_id in energy:
-                value = energy[sensor_id]
-            elif sensor_id in water:
-                value = water[sensor_id]
-            else:
-                continue
-            
-            sums[sensor_id] += value
-            stats.append((ts, meta_ids[sensor_id], ts, None, None, None, None, value, sums[sensor_id]))
-        
-        current += timedelta(hours=1)
-        i += 1
-        if i % 2000 == 0:
-            print(f"  Energy: {i}/{total} hours ({100*i//total}%)")
-    
+def _stats_array(ts: np.ndarray, meta_id_list: list, dtype: np.dtype) -> np.ndarray:
+    """Allocate stats rows as one block of len(ts) rows per metadata id, keys filled in."""
+    stats = np.empty(len(meta_id_list) * ts.size, dtype=dtype)
+    stats["created_ts"] = np.tile(ts, len(meta_id_list))
+    stats["start_ts"] = stats["created_ts"]
+    stats["metadata_id"] = np.repeat(meta_id_list, ts.size)
     return stats
 
 
-def generate_power_statistics(start: datetime, end: datetime, meta_ids: dict) -> list:
-    """Generate 5-minute power statistics."""
-    stats = []
-    current = start
-    interval = timedelta(minutes=5)
-    
-    smoothers = {
-        'solar': SmoothValue(0, 0.92), 'battery': SmoothValue(0, 0.88),
-        'grid': SmoothValue(1000, 0.85), 'heat_pump': SmoothValue(500, 0.90),
-        'induction': SmoothValue(0, 0.70), 'water_heater': SmoothValue(0, 0.80),
-        'ac': SmoothValue(0, 0.90), 'lighting': SmoothValue(50, 0.85),
-        'washing': SmoothValue(0, 0.75), 'ev': SmoothValue(0, 0.95),
-    }
-    
-    total = int((end - start).total_seconds() / 300)
-    i = 0
-    
-    while current < end:
-        power = calculate_power(current, smoothers)
-        ts = current.timestamp()
-        
-        for sensor_id, meta_id in meta_ids.items():
-            if sensor_id in power:
-                mean = power[sensor_id]
-                stats.append((ts, meta_id, ts, mean, mean * 0.95, mean * 1.05, None, None))
-        
-        current += interval
-        i += 1
-        if i % 5000 == 0:
-            print(f"  Power: {i}/{total} intervals ({100*i//total}%)")
-    
-    return stats
+def _iter_chunks(cols: dict, chunk_steps: int):
+    """Split time columns into consecutive slices of at most chunk_steps steps."""
+    for lo in range(0, cols["ts"].size, chunk_steps):
+        yield {name: col[lo:lo + chunk_steps] for name, col in cols.items()}
+
+
+def generate_energy_statistics(start: datetime, end: datetime, meta_ids: dict,
+                               chunk_rows: int = COPY_CHUNK_ROWS):
+    """Generate hourly energy statistics, yielding ENERGY_DTYPE arrays per chunk."""
+    step = ENERGY_INTERVAL
+    smoothers = initial_smoother_state()
+    totals = None
+    # Sensor set is static: resolve it once, not per chunk
+    sensor_ids = [sensor_id for sensor_id in meta_ids if sensor_id in ENERGY_SENSORS]
+    sensor_meta_ids = [meta_ids[sensor_id] for sensor_id in sensor_ids]
+
+    chunk_steps = max(1, chunk_rows // max(1, len(sensor_ids)))
+    for cols in _iter_chunks(_build_time_columns(start, end, step), chunk_steps):
+        power = calculate_power(cols, smoothers)
+        series = {**calculate_energy(power), **calculate_water(cols)}
+
+        stats = _stats_array(cols["ts"], sensor_meta_ids, ENERGY_DTYPE)
+        # One row per sensor; running sums are a prefix sum along the time axis
+        values = np.array([series[sensor_id] for sensor_id in sensor_ids], dtype=np.float64)
+        values = values.reshape(len(sensor_ids), cols["ts"].size)
+        sums = np.cumsum(values, axis=1, dtype=np.float64)
+        if totals is not None:
+            sums += totals[:, None]
+        totals = sums[:, -1]
+        stats["state"] = values.ravel()
+        stats["sum"] = sums.ravel()
+
+        yield stats
+
+
+def generate_power_statistics(start: datetime, end: datetime, meta_ids: dict,
+                              chunk_rows: int = COPY_CHUNK_ROWS):
+    """Generate 5-minute power statistics, yielding POWER_DTYPE arrays per chunk."""
+    step = POWER_INTERVAL
+    smoothers = initial_smoother_state()
+    sensor_ids = [sensor_id for sensor_id in meta_ids if sensor_id in POWER_SENSORS]
+    sensor_meta_ids = [meta_ids[sensor_id] for sensor_id in sensor_ids]
+
+    chunk_steps = max(1, chunk_rows // max(1, len(sensor_ids)))
+    for cols in _iter_chunks(_build_time_columns(start, end, step), chunk_steps):
+        power = calculate_power(cols, smoothers)
+
+        stats = _stats_array(cols["ts"], sensor_meta_ids, POWER_DTYPE)
+        means = np.array([power[sensor_id] for sensor_id in sensor_ids], dtype=np.float64)
+        stats["mean"] = means.reshape(len(sensor_ids), cols["ts"].size).ravel()
+        stats["min"] = stats["mean"] * 0.95
+        stats["max"] = stats["mean"] * 1.05
+
+        yield stats
+
+
+def _to_pgcopy(stats: np.ndarray) -> io.BytesIO:
+    """Serialize a record array into PostgreSQL's binary COPY format.
+
+    Integer fields are sent as int4 and float fields as float8, matching the
+    recorder's column types. Rows are laid out with a packed big-endian dtype
+    (field count, then a length prefix before each value) and filled column
+    by column, so the whole chunk is written as one buffer.
+    """
+    names = stats.dtype.names
+    layout = [("field_count", ">i2")]
+    for name in names:
+        layout += [(name + "_len", ">i4"), (name, ">i4" if stats.dtype[name].kind == "i" else ">f8")]
+
+    wire = np.empty(len(stats), dtype=layout)
+    wire["field_count"] = len(names)
+    for name in names:
+        wire[name + "_len"] = wire.dtype[name].itemsize
+        wire[name] = stats[name]
+
+    buf = io.BytesIO()
+    buf.write(_PGCOPY_HEADER)
+    buf.write(wire.data)
+    buf.write(_PGCOPY_TRAILER)
+    buf.seek(0)
+    return buf
+
+
+def log(pipeline: str, message: str):
+    """Print a progress line tagged with its pipeline.
+
+    Energy and power run in parallel worker processes, so lines are flushed
+    immediately and labelled to keep the add-on log readable.
+    """
+    print(f"  [{pipeline}] {message}", flush=True)
+
 
+def copy_rows(conn, table: str, chunks) -> int:
+    """Bulk-load record-array chunks into a table with COPY ... FROM STDIN.
 
-def insert_energy_stats(conn, stats: list, meta_ids: dict):
-    """Insert energy statistics."""
+    Only the arrays' fields are loaded; other columns get their default (NULL).
+    Chunks are serialized (binary COPY format) here and copied by a single
+    writer thread, so generating the next chunk overlaps with the database
+    I/O of the previous one. At most two chunks are in flight at a time.
+
+    Returns the number of rows copied.
+    """
+    cursor = conn.cursor()
+    in_flight = deque()
+    rows = 0
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        for stats in chunks:
+            if len(in_flight) == 2:
+                in_flight.popleft().result()
+            columns = ", ".join(stats.dtype.names)
+            sql = f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT binary)"
+            in_flight.append(writer.submit(cursor.copy_expert, sql, _to_pgcopy(stats)))
+            rows += len(stats)
+        for future in in_flight:
+            future.result()
+
+    return rows
+
+
+def insert_energy_stats(conn, stats, meta_ids: dict) -> int:
+    """Replace energy statistics in a single transaction; returns the row count."""
     cursor = conn.cursor()
     
-    print("  Clearing old energy stats...")
-    # Get ALL metadata_ids for energy sensors from DB
-    sensor_names = tuple(ENERGY_SENSORS.keys())
+    log("energy", "Clearing old stats...")
+    # Clear ALL energy sensors known to the DB, resolving their ids server-side
     cursor.execute(
-        "SELECT id FROM statistics_meta WHERE statistic_id IN %s",
-        (sensor_names,)
+        """DELETE FROM statistics WHERE metadata_id IN
+        (SELECT id FROM statistics_meta WHERE statistic_id = ANY(%s))""",
+        (list(ENERGY_SENSORS.keys()),)
     )
-    all_meta_ids = [row[0] for row in cursor.fetchall()]
-    
-    for meta_id in all_meta_ids:
-        cursor.execute("DELETE FROM statistics WHERE metadata_id = %s", (meta_id,))
-    conn.commit()
-    print(f"    Cleared {len(all_meta_ids)} sensors")
-    
-    # Deduplicate stats (keep last occurrence)
-    seen = {}
-    for s in stats:
-        key = (s[1], s[2])  # (metadata_id, start_ts)
-        seen[key] = s
-    unique_stats = list(seen.values())
+    log("energy", f"Cleared {cursor.rowcount} records")
     
-    print(f"  Inserting {len(unique_stats)} records (deduped from {len(stats)})...")
-    batch_size = 5000
-    for i in range(0, len(unique_stats), batch_size):
-        batch = unique_stats[i:i + batch_size]
-        execute_values(
-            cursor,
-            """INSERT INTO statistics 
-            (created_ts, metadata_id, start_ts, mean, min, max, last_reset_ts, state, sum)
-            VALUES %s""",
-            batch
-        )
-        if (i + batch_size) % 50000 == 0:
-            print(f"    Inserted {i + len(batch)}/{len(unique_stats)}...")
+    log("energy", "Inserting records...")
+    rows = copy_rows(conn, "statistics", stats)
     
     conn.commit()
-    print(f"  Inserted {len(stats)} energy records")
+    log("energy", f"Inserted {rows:,} records")
+    return rows
 
 
-def insert_power_stats(conn, stats: list, meta_ids: dict):
-    """Insert short-term power statistics."""
+def insert_power_stats(conn, stats, meta_ids: dict) -> int:
+    """Replace short-term power statistics in a single transaction; returns the row count."""
     cursor = conn.cursor()
     
-    print("  Clearing old power stats...")
-    for meta_id in meta_ids.values():
-        cursor.execute("DELETE FROM statistics_short_term WHERE metadata_id = %s", (meta_id,))
-    conn.commit()
+    log("power", "Clearing old stats...")
+    cursor.execute(
+        "DELETE FROM statistics_short_term WHERE metadata_id = ANY(%s)",
+        (list(meta_ids.values()),)
+    )
+    log("power", f"Cleared {cursor.rowcount} records")
     
-    print(f"  Inserting {len(stats)} records...")
-    batch_size = 5000
-    for i in range(0, len(stats), batch_size):
-        execute_values(
-            cursor,
-            """INSERT INTO statistics_short_term 
-            (created_ts, metadata_id, start_ts, mean, min, max, last_reset_ts, state)
-            VALUES %s
-            ON CONFLICT (metadata_id, start_ts) DO UPDATE SET
-                mean = EXCLUDED.mean,
-                min = EXCLUDED.min,
-                max = EXCLUDED.max,
-                created_ts = EXCLUDED.created_ts""",
-            stats[i:i + batch_size]
-        )
+    log("power", "Inserting records...")
+    # COPY cannot upsert: load into a staging table, then merge in one statement.
+    # Temp tables skip WAL, and this one goes away with the transaction.
+    columns = ", ".join(POWER_DTYPE.names)
+    cursor.execute(
+        f"""CREATE TEMP TABLE short_term_stage ON COMMIT DROP AS
+        SELECT {columns} FROM statistics_short_term WITH NO DATA"""
+    )
+    rows = copy_rows(conn, "short_term_stage", stats)
+    cursor.execute(
+        f"""INSERT INTO statistics_short_term ({columns})
+        SELECT {columns} FROM short_term_stage
+        ON CONFLICT (metadata_id, start_ts) DO UPDATE SET
+            mean = EXCLUDED.mean,
+            min = EXCLUDED.min,
+            max = EXCLUDED.max,
+            created_ts = EXCLUDED.created_ts"""
+    )
     
     conn.commit()
-    print(f"  Inserted {len(stats)} power records")
+    log("power", f"Inserted {rows:,} records")
+    return rows
+
+
+def run_energy(db_url: str, start: datetime, end: datetime, meta_ids: dict) -> int:
+    """Regenerate energy statistics over a dedicated connection."""
+    conn = connect(db_url)
+    try:
+        return insert_energy_stats(conn, generate_energy_statistics(start, end, meta_ids), meta_ids)
+    finally:
+        conn.close()
+
+
+def run_power(db_url: str, start: datetime, end: datetime, meta_ids: dict) -> int:
+    """Regenerate power statistics over a dedicated connection."""
+    conn = connect(db_url)
+    try:
+        return insert_power_stats(conn, generate_power_statistics(start, end, meta_ids), meta_ids)
+    finally:
+        conn.close()
 
 
 # ============================================
@@ -456,7 +674,7 @@ def main():
     print("🔄 Home Assistant Demo Data Regeneration")
     print("=" * 50)
     
-    conn = psycopg2.connect(args.db_url)
+    conn = connect(args.db_url)
     
     now = datetime.now().replace(minute=0, second=0, microsecond=0)
     energy_start = now - timedelta(days=int(args.energy_years * 365))
@@ -468,24 +686,33 @@ def main():
     all_sensors = {**ENERGY_SENSORS, **POWER_SENSORS}
     meta_ids = ensure_metadata(conn, all_sensors)
     print(f"   {len(meta_ids)} sensors configured")
+    conn.close()
     
-    # Generate energy statistics
-    print(f"\n⚡ Generating energy statistics ({args.energy_years} years)...")
+    # Energy and power use disjoint sensors and tables: run both pipelines at once
     energy_meta = {k: meta_ids[k] for k in ENERGY_SENSORS.keys() if k in meta_ids}
-    energy_stats = generate_energy_statistics(energy_start, now, energy_meta)
-    insert_energy_stats(conn, energy_stats, energy_meta)
-    
-    # Generate power statistics
-    print(f"\n🔌 Generating power statistics ({args.power_days} days)...")
+    energy_total = _step_count(energy_start, now, ENERGY_INTERVAL) * len(energy_meta)
+    print(f"\n⚡ Generating energy statistics ({args.energy_years} years, {energy_total:,} records)...")
     power_meta = {k: meta_ids[k] for k in POWER_SENSORS.keys() if k in meta_ids}
-    power_stats = generate_power_statistics(power_start, now, power_meta)
-    insert_power_stats(conn, power_stats, power_meta)
-    
-    conn.close()
+    power_total = _step_count(power_start, now, POWER_INTERVAL) * len(power_meta)
+    print(f"🔌 Generating power statistics ({args.power_days} days, {power_total:,} records)...", flush=True)
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        futures = {
+            "energy": pool.submit(run_energy, args.db_url, energy_start, now, energy_meta),
+            "power": pool.submit(run_power, args.db_url, power_start, now, power_meta),
+        }
+        rows = {}
+        for pipeline, future in futures.items():
+            try:
+                rows[pipeline] = future.result()
+            except Exception:
+                print(f"\n❌ {pipeline} regeneration failed:")
+                traceback.print_exc()
+    if len(rows) < len(futures):
+        exit(1)
     
     print("\n✅ Done!")
-    print(f"   Energy: {len(energy_stats):,} records")
-    print(f"   Power: {len(power_stats):,} records")
+    print(f"   Energy: {rows['energy']:,} records")
+    print(f"   Power: {rows['power']:,} records")
 
 
 if __name__ == "__main__":